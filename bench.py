@@ -0,0 +1,327 @@
+"""Load test and benchmark harness for the chat server.
+
+Starts ``main:app`` under uvicorn against a throwaway SQLite database (or the
+database given with --database-url), then:
+
+  1. opens --clients WebSocket connections and records server memory per
+     connection,
+  2. has every client send --messages direct messages to a partner client
+     and measures delivery latency percentiles and messages/sec,
+  3. grows one conversation to each of --history-sizes messages and times
+     the /chat page and the history API at each size.
+
+Results are written as JSON (stdout or --output) so runs can be diffed.
+
+    python bench.py --clients 2000 --messages 20 --output before.json
+    DATABASE_URL=postgresql://localhost/chat_bench python bench.py --database-url env
+"""
+from http.cookiejar import CookieJar
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.parse
+import urllib.request
+
+import websockets
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+def percentiles(samples: list[float]) -> dict:
+    if not samples:
+        return {"count": 0}
+    ordered = sorted(samples)
+    def pick(p):
+        return ordered[min(len(ordered) - 1, int(p / 100 * len(ordered)))]
+    return {
+        "count": len(ordered),
+        "mean_ms": statistics.fmean(ordered) * 1e3,
+        "p50_ms": pick(50) * 1e3,
+        "p90_ms": pick(90) * 1e3,
+        "p99_ms": pick(99) * 1e3,
+        "max_ms": ordered[-1] * 1e3,
+    }
+
+def rss_bytes(pid: int) -> int:
+    # The server and any uvicorn worker processes (Linux /proc only).
+    pids = [pid]
+    for entry in os.listdir("/proc"):
+        if entry.isdigit():
+            try:
+                with open(f"/proc/{entry}/stat") as f:
+                    if int(f.read().rsplit(")", 1)[1].split()[1]) == pid:
+                        pids.append(int(entry))
+            except (OSError, IndexError, ValueError):
+                pass
+    total = 0
+    for p in pids:
+        try:
+            with open(f"/proc/{p}/status") as f:
+                for line in f:
+                    if line.startswith("VmRSS:"):
+                        total += int(line.split()[1]) * 1024
+        except OSError:
+            pass
+    return total
+
+def raise_fd_limit(needed: int):
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if soft < needed:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (min(needed, hard), hard))
+
+class Server:
+    def __init__(self, database_url: str, port: int, workers: int, backend: str):
+        self.database_url = database_url
+        self.port = port
+        self.workers = workers
+        self.backend = backend
+        self.base = f"http://127.0.0.1:{port}"
+
+    def __enter__(self):
+        env = dict(os.environ, DATABASE_URL=self.database_url, BCRYPT_ROUNDS="4",
+                   HEARTBEAT_INTERVAL="3600", METRICS_ENABLED="0", CHAT_BACKEND=self.backend)
+        self.process = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(self.port),
+             "--workers", str(self.workers), "--log-level", "warning"],
+            cwd=HERE, env=env,
+        )
+        deadline = time.monotonic() + 30
+        while time.monotonic() < deadline:
+            try:
+                urllib.request.urlopen(self.base + "/login", timeout=1).read()
+                return self
+            except OSError:
+                if self.process.poll() is not None:
+                    raise RuntimeError("server exited during startup")
+                time.sleep(0.2)
+        self.process.terminate()
+        raise RuntimeError("server did not start within 30s")
+
+    def __exit__(self, *exc):
+        self.process.terminate()
+        self.process.wait(timeout=30)
+
+class Browser:
+    """A logged-in HTTP session using only the standard library."""
+    def __init__(self, base: str):
+        self.base = base
+        self.cookies = CookieJar()
+        self.opener = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(self.cookies))
+
+    def post(self, path: str, **form):
+        data = urllib.parse.urlencode(form).encode()
+        return self.opener.open(self.base + path, data=data, timeout=30).read()
+
+    def get(self, path: str) -> bytes:
+        return self.opener.open(self.base + path, timeout=30).read()
+
+    def login(self, username: str, password: str):
+        self.post("/register", username=username, password=password)
+        self.post("/login", username=username, password=password)
+
+    def cookie_header(self) -> str:
+        return "; ".join(f"{cookie.name}={cookie.value}" for cookie in self.cookies)
+
+async def open_clients(base: str, count: int, concurrency: int = 200):
+    # Sockets take their identity from the session cookie, so every client
+    # registers and logs in first.
+    base_ws = base.replace("http", "ws", 1)
+    gate = asyncio.Semaphore(concurrency)
+
+    async def open_one(i):
+        async with gate:
+            browser = Browser(base)
+            await asyncio.to_thread(browser.login, f"bench{i}", "bench-password")
+            peer = i ^ 1
+            return await websockets.connect(
+                f"{base_ws}/ws/chat/bench{peer}",
+                additional_headers={"Cookie": browser.cookie_header()},
+                ping_interval=None, max_size=None, open_timeout=60,
+            )
+
+    return await asyncio.gather(*(open_one(i) for i in range(count)))
+
+async def run_messaging(clients, messages: int, rate: float, timeout: float) -> dict:
+    expected = len(clients) * messages
+    latencies: list[float] = []
+    done = asyncio.Event()
+
+    async def receive(ws):
+        async for raw in ws:
+            data = json.loads(raw)
+            for item in data if isinstance(data, list) else [data]:
+                if item.get("type") == "ping":
+                    await ws.send(json.dumps({"type": "pong"}))
+                    continue
+                latencies.append(time.perf_counter() - float(item["message"]))
+                if len(latencies) >= expected:
+                    done.set()
+
+    async def send(i, ws):
+        # Stagger start times so clients do not fire in lockstep.
+        await asyncio.sleep(random.random() / rate if rate else 0)
+        for _ in range(messages):
+            await ws.send(json.dumps({"message": repr(time.perf_counter())}))
+            if rate:
+                await asyncio.sleep(1 / rate)
+
+    receivers = [asyncio.create_task(receive(ws)) for ws in clients]
+    start = time.perf_counter()
+    await asyncio.gather(*(send(i, ws) for i, ws in enumerate(clients)))
+    sent_elapsed = time.perf_counter() - start
+    try:
+        await asyncio.wait_for(done.wait(), timeout)
+    except asyncio.TimeoutError:
+        pass
+    elapsed = time.perf_counter() - start
+    for task in receivers:
+        task.cancel()
+    return {
+        "sent": expected,
+        "delivered": len(latencies),
+        "lost": expected - len(latencies),
+        "send_seconds": sent_elapsed,
+        "elapsed_seconds": elapsed,
+        "messages_per_second": len(latencies) / elapsed if elapsed else 0,
+        "latency": percentiles(latencies),
+    }
+
+def seed_history(database_url: str, total: int):
+    """Top up the bench_a/bench_b conversation to ``total`` messages."""
+    os.environ["DATABASE_URL"] = database_url
+    sys.path.insert(0, HERE)
+    import main
+    from sqlalchemy import func, insert
+
+    conversation = main.conversation_key("bench_a", "bench_b")
+    with main.SessionLocal() as db:
+        have = db.query(func.count(main.Message.id)).filter(main.Message.conversation == conversation).scalar()
+        rows = []
+        for n in range(have, total):
+            sender, recipient = ("bench_a", "bench_b") if n % 2 else ("bench_b", "bench_a")
+            rows.append({"sender": sender, "recipient": recipient, "content": f"history message {n}",
+                         "conversation": conversation})
+            if len(rows) == 10000:
+                db.execute(insert(main.Message), rows)
+                rows = []
+        if rows:
+            db.execute(insert(main.Message), rows)
+        db.commit()
+        oldest = db.query(func.min(main.Message.id)).filter(main.Message.conversation == conversation).scalar()
+    main.engine.dispose()
+    return oldest
+
+def time_requests(browser: Browser, path: str, repeat: int) -> dict:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        browser.get(path)
+        samples.append(time.perf_counter() - start)
+    return percentiles(samples)
+
+def run_history(server: Server, sizes: list[int], repeat: int) -> list[dict]:
+    browser = Browser(server.base)
+    browser.login("bench_a", "bench-password")
+    results = []
+    for size in sizes:
+        oldest = seed_history(server.database_url, size)
+        results.append({
+            "messages": size,
+            "chat_page": time_requests(browser, "/chat/bench_b", repeat),
+            "history_api_latest": time_requests(browser, "/api/chat/bench_b/messages", repeat),
+            "history_api_oldest": time_requests(browser, f"/api/chat/bench_b/messages?before={oldest + 50}", repeat),
+        })
+    return results
+
+async def run_sockets(server: Server, args) -> dict:
+    rss_before = rss_bytes(server.process.pid)
+    start = time.perf_counter()
+    clients = await open_clients(server.base, args.clients)
+    connect_seconds = time.perf_counter() - start
+    await asyncio.sleep(1)
+    rss_after = rss_bytes(server.process.pid)
+    try:
+        messaging = await run_messaging(clients, args.messages, args.rate, args.timeout)
+    finally:
+        await asyncio.gather(*(ws.close() for ws in clients), return_exceptions=True)
+    return {
+        "clients": args.clients,
+        "connect_seconds": connect_seconds,
+        "server_rss_before_bytes": rss_before,
+        "server_rss_after_bytes": rss_after,
+        "memory_per_connection_bytes": (rss_after - rss_before) / args.clients if args.clients else 0,
+        "messaging": messaging,
+    }
+
+def git_revision() -> str | None:
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], cwd=HERE, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--database-url", default=None,
+                        help="database to run against; 'env' uses $DATABASE_URL (default: temporary SQLite file)")
+    parser.add_argument("--clients", type=int, default=1000, help="simulated WebSocket clients (even number)")
+    parser.add_argument("--messages", type=int, default=10, help="messages each client sends")
+    parser.add_argument("--rate", type=float, default=2.0, help="messages/sec per client; 0 sends as fast as possible")
+    parser.add_argument("--timeout", type=float, default=60.0, help="seconds to wait for delivery after sending")
+    parser.add_argument("--history-sizes", default="1000,10000,100000",
+                        help="comma-separated conversation sizes to time history at")
+    parser.add_argument("--repeat", type=int, default=50, help="requests per history measurement")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn worker processes")
+    parser.add_argument("--backend", choices=["local", "postgres"], default="local",
+                        help="CHAT_BACKEND for the server; more than one worker needs 'postgres'")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write JSON results here instead of stdout")
+    args = parser.parse_args()
+
+    if args.workers > 1 and args.backend != "postgres":
+        # With an in-process backend, messages between workers are never
+        # delivered and would be reported as lost.
+        parser.error("--workers > 1 needs a cross-worker backend: use --backend postgres")
+    random.seed(args.seed)
+    args.clients += args.clients % 2
+    raise_fd_limit(args.clients * 2 + 256)
+    with tempfile.TemporaryDirectory() as tmp:
+        if args.database_url == "env":
+            database_url = os.environ["DATABASE_URL"]
+        else:
+            database_url = args.database_url or f"sqlite:///{tmp}/bench.db"
+        if args.backend == "postgres" and not database_url.startswith("postgresql"):
+            parser.error("--backend postgres needs a Postgres --database-url")
+        with Server(database_url, args.port, args.workers, args.backend) as server:
+            sockets = asyncio.run(run_sockets(server, args))
+            sizes = [int(size) for size in args.history_sizes.split(",") if size]
+            history = run_history(server, sizes, args.repeat)
+
+    results = {
+        "started_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "git_revision": git_revision(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "database": database_url.split(":", 1)[0],
+        "config": {key: value for key, value in vars(args).items() if key != "database_url"},
+        "sockets": sockets,
+        "history": history,
+    }
+    text = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+if __name__ == "__main__":
+    main_cli()
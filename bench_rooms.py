@@ -0,0 +1,82 @@
+"""Room broadcast latency benchmark.
+
+Measures ChatManager.broadcast in-process with fake sockets: the time from
+the broadcast call until the last member's socket has been written, for each
+room size in --members. One member's socket never completes a send, to show
+that a stalled member does not hold up the rest. Results are printed as JSON.
+
+    python bench_rooms.py --members 10,100,1000 --messages 200
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+
+class FakeSocket:
+    def __init__(self, on_sent, stalled: bool = False):
+        self.on_sent = on_sent
+        self.stalled = stalled
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, frame: str):
+        if self.stalled:
+            await asyncio.sleep(3600)
+        await asyncio.sleep(0)
+        self.on_sent()
+
+    async def close(self, code: int = 1000):
+        pass
+
+async def measure(main, members: int, messages: int) -> dict:
+    class NullWriter(main.MessageWriter):
+        async def enqueue(self, *args, **kwargs):
+            pass
+
+    manager = main.ChatManager(writer=NullWriter())
+    await manager.start()
+    loop = asyncio.get_running_loop()
+    state = {"left": 0, "done": None}
+
+    def on_sent():
+        state["left"] -= 1
+        if state["left"] == 0:
+            state["done"].set_result(time.perf_counter())
+
+    for i in range(members):
+        await manager.connect(FakeSocket(on_sent, stalled=i == 0), f"member{i}", main.room_key("BENCH"))
+    latencies = []
+    for n in range(messages):
+        state["done"] = loop.create_future()
+        state["left"] = members - 1
+        start = time.perf_counter()
+        await manager.broadcast("BENCH", "member1", f"message {n}")
+        latencies.append(await state["done"] - start)
+    await manager.stop()
+
+    latencies.sort()
+    def pick(p):
+        return latencies[min(len(latencies) - 1, int(p / 100 * len(latencies)))] * 1e3
+    return {"members": members, "messages": messages,
+            "p50_ms": pick(50), "p90_ms": pick(90), "p99_ms": pick(99), "max_ms": latencies[-1] * 1e3}
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--members", default="10,100,1000", help="comma-separated room sizes")
+    parser.add_argument("--messages", type=int, default=200, help="broadcasts per room size")
+    args = parser.parse_args()
+
+    # The app module reads its database at import; nothing is written here.
+    os.environ.setdefault("DATABASE_URL", f"sqlite:///{tempfile.mkdtemp()}/bench_rooms.db")
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    import main
+
+    results = [asyncio.run(measure(main, int(size), args.messages)) for size in args.members.split(",") if size]
+    print(json.dumps({"broadcast": results}, indent=2))
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,102 @@
+"""Full-text search latency benchmark.
+
+Seeds direct messages between --users users until the database holds each
+size in --sizes, then times main.search_messages for --queries random
+(user, term) pairs and prints p50/p95/p99 per size as JSON. Words are drawn
+from a synthetic vocabulary, Zipf-distributed by default, so a few terms
+match most rows the way common words do; --vocabulary uniform spreads them
+evenly. Seeding only tops up, so sizes are cumulative and reruns are cheap.
+
+    python bench_search.py --sizes 100000,1000000
+    DATABASE_URL=postgresql://localhost/chat_bench python bench_search.py --database-url env
+"""
+import argparse
+import itertools
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+SEED_BATCH = 10000
+
+def percentiles(samples: list[float]) -> dict:
+    ordered = sorted(samples)
+    def pick(p):
+        return ordered[min(len(ordered) - 1, int(p / 100 * len(ordered)))] * 1e3
+    return {"count": len(ordered), "mean_ms": statistics.fmean(ordered) * 1e3,
+            "p50_ms": pick(50), "p95_ms": pick(95), "p99_ms": pick(99), "max_ms": ordered[-1] * 1e3}
+
+def word_picker(rng: random.Random, size: int, distribution: str):
+    words = [f"term{rank}" for rank in range(1, size + 1)]
+    weights = [1 / rank for rank in range(1, size + 1)] if distribution == "zipf" else [1] * size
+    cumulative = list(itertools.accumulate(weights))
+    return lambda k: rng.choices(words, cum_weights=cumulative, k=k)
+
+def seed(main, total: int, users: int, pick_words, rng: random.Random) -> int:
+    from sqlalchemy import func, insert
+
+    with main.SessionLocal() as db:
+        have = db.query(func.count(main.Message.id)).scalar()
+        rows = []
+        for _ in range(have, total):
+            sender, recipient = (f"searcher{n}" for n in rng.sample(range(users), 2))
+            rows.append({"sender": sender, "recipient": recipient,
+                         "content": " ".join(pick_words(rng.randint(8, 15))),
+                         "conversation": main.conversation_key(sender, recipient)})
+            if len(rows) == SEED_BATCH:
+                db.execute(insert(main.Message), rows)
+                db.commit()
+                rows = []
+        if rows:
+            db.execute(insert(main.Message), rows)
+            db.commit()
+    return max(0, total - have)
+
+def measure(main, queries: int, users: int, pick_words, rng: random.Random) -> dict:
+    samples, hits = [], []
+    with main.SessionLocal() as db:
+        for _ in range(queries):
+            username, term = f"searcher{rng.randrange(users)}", pick_words(1)[0]
+            start = time.perf_counter()
+            results, _ = main.search_messages(db, username, term)
+            samples.append(time.perf_counter() - start)
+            hits.append(len(results))
+    return {"latency": percentiles(samples), "queries_with_results": sum(1 for n in hits if n)}
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--database-url", default=None,
+                        help="database to run against; 'env' uses $DATABASE_URL (default: temporary SQLite file)")
+    parser.add_argument("--sizes", default="100000,1000000", help="comma-separated total message counts")
+    parser.add_argument("--users", type=int, default=200, help="distinct senders and recipients")
+    parser.add_argument("--queries", type=int, default=300, help="searches timed per size")
+    parser.add_argument("--vocabulary", choices=["zipf", "uniform"], default="zipf")
+    parser.add_argument("--vocabulary-size", type=int, default=5000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    if args.database_url != "env":
+        os.environ["DATABASE_URL"] = args.database_url or f"sqlite:///{tempfile.mkdtemp()}/bench_search.db"
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    import main
+
+    main.init_db()
+    rng = random.Random(args.seed)
+    pick_words = word_picker(rng, args.vocabulary_size, args.vocabulary)
+    results = []
+    for size in (int(size) for size in args.sizes.split(",") if size):
+        start = time.perf_counter()
+        seeded = seed(main, size, args.users, pick_words, rng)
+        results.append({"messages": size, "seeded": seeded, "seed_seconds": time.perf_counter() - start,
+                        **measure(main, args.queries, args.users, pick_words, rng)})
+    print(json.dumps({
+        "database": main.engine.dialect.name,
+        "config": {key: value for key, value in vars(args).items() if key != "database_url"},
+        "search": results,
+    }, indent=2))
+
+if __name__ == "__main__":
+    main_cli()
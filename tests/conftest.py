@@ -0,0 +1,8 @@
+import os
+import sys
+import tempfile
+
+# main reads its configuration at import time.
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{tempfile.mkdtemp()}/test.db")
+os.environ.setdefault("BCRYPT_ROUNDS", "4")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,26 @@
+import asyncio
+
+from fastapi import HTTPException
+
+import main
+
+
+def test_login_succeeds_when_rehash_is_refused(monkeypatch):
+    main.init_db()
+    with main.SessionLocal() as db:
+        main.create_user(db, "rehash_user", main.hash_password("pw", rounds=5))
+
+    async def busy_hash(password):
+        raise HTTPException(status_code=503)
+
+    monkeypatch.setattr(main.password_hasher, "hash", busy_hash)
+
+    async def scenario():
+        with main.SessionLocal() as db:
+            user = await main.authenticate_user(db, "rehash_user", "pw")
+            return user, user.password_hash
+
+    user, password_hash = asyncio.run(scenario())
+    main.password_hasher.stop()
+    assert user is not None
+    assert main.hash_rounds(password_hash) == 5
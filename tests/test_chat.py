@@ -0,0 +1,42 @@
+import pytest
+from fastapi.testclient import TestClient
+from starlette.websockets import WebSocketDisconnect
+
+import main
+
+
+@pytest.fixture
+def client():
+    with TestClient(main.app) as client:
+        yield client
+
+
+def login(client, username):
+    client.post("/register", data={"username": username, "password": "pw"})
+    client.post("/login", data={"username": username, "password": "pw"})
+
+
+def test_direct_socket_requires_session(client):
+    with pytest.raises(WebSocketDisconnect) as exc:
+        with client.websocket_connect("/ws/chat/dm_bob?username=dm_alice") as ws:
+            ws.receive_json()
+    assert exc.value.code == 1008
+
+
+def test_direct_socket_sender_is_session_user():
+    with TestClient(main.app) as client:
+        login(client, "dm_alice")
+        with client.websocket_connect("/ws/chat/dm_bob?username=dm_carol") as ws:
+            ws.send_json({"from": "dm_carol", "message": "signed by the session"})
+    # Leaving the client shut the app down, which drains the writer.
+    with main.SessionLocal() as db:
+        senders = {m.sender for m in db.query(main.Message).filter(main.Message.content == "signed by the session")}
+    assert senders == {"dm_alice"}
+
+
+def test_oversized_message_is_refused(client, monkeypatch):
+    monkeypatch.setattr(main, "MAX_MESSAGE_BYTES", 20)
+    login(client, "dm_sizer")
+    with client.websocket_connect("/ws/chat/dm_sizer_peer") as ws:
+        ws.send_json({"message": "x" * 40})
+        assert ws.receive_json()["error"] == "message_too_large"
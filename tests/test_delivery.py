@@ -0,0 +1,95 @@
+import asyncio
+import json
+
+import main
+
+
+class FakeSocket:
+    def __init__(self):
+        self.sent = []
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, frame):
+        self.sent.append(json.loads(frame))
+
+    async def close(self, code=1000):
+        pass
+
+
+class NullWriter(main.MessageWriter):
+    async def enqueue(self, *args, **kwargs):
+        pass
+
+
+def make_worker(hub):
+    return main.ChatManager(main.PubSubBackend(main.MemoryBroker(hub)), NullWriter())
+
+
+def test_message_reaches_socket_on_other_worker():
+    async def scenario():
+        hub = {}
+        first, second = make_worker(hub), make_worker(hub)
+        await first.start()
+        await second.start()
+        bob = FakeSocket()
+        await second.connect(bob, "bob")
+
+        await first.store_and_send("alice", "bob", "hello")
+        await asyncio.sleep(0.05)
+
+        await first.stop()
+        await second.stop()
+        return bob.sent
+
+    sent = asyncio.run(scenario())
+    assert [(m["from"], m["message"]) for m in sent] == [("alice", "hello")]
+
+
+def test_unsubscribe_after_last_disconnect_stops_delivery():
+    async def scenario():
+        hub = {}
+        first, second = make_worker(hub), make_worker(hub)
+        await first.start()
+        await second.start()
+        bob_tab, bob_phone = FakeSocket(), FakeSocket()
+        tab = await second.connect(bob_tab, "bob")
+        phone = await second.connect(bob_phone, "bob")
+
+        await second.disconnect(tab)
+        await first.store_and_send("alice", "bob", "still here")
+        await asyncio.sleep(0.05)
+        await second.disconnect(phone)
+        await first.store_and_send("alice", "bob", "gone")
+        await asyncio.sleep(0.05)
+
+        channel = main.channel_for("bob")
+        subscribers = hub.get(channel, set())
+        await first.stop()
+        await second.stop()
+        return bob_phone.sent, subscribers
+
+    phone_sent, subscribers = asyncio.run(scenario())
+    assert [m["message"] for m in phone_sent] == ["still here"]
+    assert not subscribers
+
+
+def test_sender_other_devices_get_copy_but_origin_does_not():
+    async def scenario():
+        manager = main.ChatManager(writer=NullWriter())
+        await manager.start()
+        alice_tab, alice_phone, bob = FakeSocket(), FakeSocket(), FakeSocket()
+        origin = await manager.connect(alice_tab, "alice")
+        await manager.connect(alice_phone, "alice")
+        await manager.connect(bob, "bob")
+
+        await manager.store_and_send("alice", "bob", "hi", origin=origin)
+        await asyncio.sleep(0.05)
+        await manager.stop()
+        return alice_tab.sent, alice_phone.sent, bob.sent
+
+    tab, phone, bob = asyncio.run(scenario())
+    assert tab == []
+    assert [(m["from"], m["to"], m["message"]) for m in phone] == [("alice", "bob", "hi")]
+    assert [m["message"] for m in bob] == ["hi"]
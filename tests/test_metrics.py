@@ -0,0 +1,19 @@
+import threading
+
+import main
+
+
+def test_histogram_count_matches_buckets_under_threads():
+    histogram = main.Histogram("test_seconds", "Test.")
+
+    def observe():
+        for _ in range(20000):
+            histogram.observe(0.001)
+
+    threads = [threading.Thread(target=observe) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    samples = dict(histogram.samples())
+    assert samples["test_seconds_count"] == samples['test_seconds_bucket{le="+Inf"}'] == 160000
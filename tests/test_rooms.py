@@ -0,0 +1,84 @@
+import pytest
+from fastapi.testclient import TestClient
+from starlette.websockets import WebSocketDisconnect
+
+import main
+
+
+@pytest.fixture
+def client():
+    with TestClient(main.app) as client:
+        yield client
+
+
+def login(client, username):
+    client.post("/register", data={"username": username, "password": "pw"})
+    client.post("/login", data={"username": username, "password": "pw"})
+
+
+def create_room(client):
+    return client.post("/rooms", follow_redirects=False).headers["location"].rsplit("/", 1)[1]
+
+
+def test_direct_message_cannot_target_a_room(client):
+    login(client, "room_owner")
+    code = create_room(client)
+    with pytest.raises(WebSocketDisconnect) as exc:
+        with client.websocket_connect(f"/ws/chat/%23{code}") as ws:
+            ws.receive_json()
+    assert exc.value.code == 1008
+
+
+def test_room_socket_uses_session_identity(client):
+    login(client, "room_member")
+    code = create_room(client)
+    client.get("/logout")
+    login(client, "room_outsider")
+    # Claiming a member's name in the query string does not grant access.
+    with pytest.raises(WebSocketDisconnect) as exc:
+        with client.websocket_connect(f"/ws/room/{code}?username=room_member") as ws:
+            ws.receive_json()
+    assert exc.value.code == 1008
+
+    client.post("/rooms/join", data={"code": code})
+    with client.websocket_connect(f"/ws/room/{code}") as ws:
+        assert ws.receive_json()["user"] == "room_outsider"
+        ws.send_json({"message": "hello"})
+        assert ws.receive_json()["from"] == "room_outsider"
+
+
+def test_viewing_a_room_does_not_join_it(client):
+    login(client, "room_host")
+    code = create_room(client)
+    client.get("/logout")
+    login(client, "room_visitor")
+    response = client.get(f"/room/{code}", follow_redirects=False)
+    assert response.status_code == 302
+    with main.SessionLocal() as db:
+        assert not main.is_room_member(db, code, "room_visitor")
+
+    response = client.post("/rooms/join", data={"code": code.lower()}, follow_redirects=False)
+    assert response.headers["location"] == f"/room/{code}"
+    assert client.get(f"/room/{code}").status_code == 200
+
+
+@pytest.mark.parametrize("global_presence", [True, False])
+def test_offline_announced_only_when_presence_is_global(client, monkeypatch, global_presence):
+    monkeypatch.setattr(main.chat_manager, "presence_is_global", global_presence)
+    suffix = "g" if global_presence else "w"
+    login(client, f"presence_a{suffix}")
+    code = create_room(client)
+    login(client, f"presence_b{suffix}")
+    client.post("/rooms/join", data={"code": code})
+    with client.websocket_connect(f"/ws/room/{code}") as watcher:
+        assert watcher.receive_json()["online"] is True
+        login(client, f"presence_a{suffix}")
+        with client.websocket_connect(f"/ws/room/{code}") as leaver:
+            leaver.receive_json()
+            assert watcher.receive_json()["online"] is True
+        watcher.send_json({"message": "after"})
+        frames = [watcher.receive_json()]
+        if frames[0].get("type") == "presence":
+            frames.append(watcher.receive_json())
+    presence = [f for f in frames if f.get("type") == "presence"]
+    assert [p["online"] for p in presence] == ([False] if global_presence else [])
@@ -0,0 +1,30 @@
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_concurrent_init_db_on_fresh_sqlite(tmp_path):
+    env = dict(os.environ, DATABASE_URL=f"sqlite:///{tmp_path}/fresh.db")
+    workers = [
+        subprocess.Popen([sys.executable, "-c", "import main; main.init_db()"], cwd=ROOT, env=env,
+                         stderr=subprocess.PIPE, text=True)
+        for _ in range(4)
+    ]
+    errors = [worker.communicate(timeout=60)[1] for worker in workers]
+    assert [worker.returncode for worker in workers] == [0] * 4, errors
+
+
+def test_init_db_restores_busy_timeout():
+    import main
+
+    main.init_db()
+    # Every pooled connection keeps the request-path timeout.
+    connections = [main.engine.connect() for _ in range(main.DB_POOL_SIZE)]
+    try:
+        timeouts = {conn.exec_driver_sql("PRAGMA busy_timeout").scalar() for conn in connections}
+    finally:
+        for conn in connections:
+            conn.close()
+    assert timeouts == {main.SQLITE_BUSY_TIMEOUT_MS}
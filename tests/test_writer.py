@@ -0,0 +1,66 @@
+import asyncio
+from datetime import datetime
+
+import pytest
+
+import main
+
+
+def row(content):
+    return {
+        "sender": "alice",
+        "recipient": "bob",
+        "content": content,
+        "conversation": main.conversation_key("alice", "bob"),
+        "timestamp": datetime(2024, 1, 1),
+    }
+
+
+def stored_contents():
+    with main.SessionLocal() as db:
+        return [m.content for m in db.query(main.Message).filter(main.Message.content.like("writer-%"))]
+
+
+def test_bad_row_does_not_stop_later_messages():
+    main.init_db()
+
+    async def scenario():
+        writer = main.MessageWriter(window=0.01)
+        await writer.start()
+        # Bypass enqueue() validation to simulate a row the driver rejects.
+        await writer.queue.put(row("writer-bad \ud800"))
+        await writer.queue.put(row("writer-ok-1"))
+        await writer.queue.join()
+        await writer.enqueue("alice", "bob", "writer-ok-2")
+        await writer.stop()
+
+    asyncio.run(scenario())
+    assert sorted(stored_contents()) == ["writer-ok-1", "writer-ok-2"]
+
+
+def test_enqueue_rejects_unencodable_content():
+    async def scenario():
+        await main.MessageWriter().enqueue("alice", "bob", "\ud800")
+
+    with pytest.raises(ValueError):
+        asyncio.run(scenario())
+
+
+def test_outage_retries_whole_batch_without_dropping(monkeypatch):
+    monkeypatch.setattr(main, "WRITE_RETRY_MAX_DELAY", 0.01)
+
+    class FlakyWriter(main.MessageWriter):
+        def __init__(self):
+            super().__init__()
+            self.outage = 5
+            self.writes = []
+
+        def write(self, rows):
+            if self.outage:
+                self.outage -= 1
+                raise main.OperationalError("INSERT", {}, Exception("server closed the connection"))
+            self.writes.append([r["content"] for r in rows])
+
+    writer = FlakyWriter()
+    asyncio.run(writer.flush([row("writer-outage-1"), row("writer-outage-2")]))
+    assert writer.writes == [["writer-outage-1", "writer-outage-2"]]